@@ -1,5 +1,7 @@
 import streamlit as st
 
+st.set_page_config(page_title="Price Action Analysis", layout="wide")
+
 monthly_analysis_page = st.Page("pages/monthly_analysis.py", title="Monthly Analysis", default=True)
 index_analysis_page = st.Page("pages/index_analysis.py", title="Index Analysis")
 stock_heatmap_page = st.Page("pages/stock_heatmap.py", title="Stock Heatmap")
@@ -6,24 +6,39 @@ import streamlit as st
 from price_action_analysis.config import INDEX_CSV
 from price_action_analysis.plots import generate_top_performers_barchart
 
-st.set_page_config(layout="wide")
+_MONTH_NAMES = tuple(month_name[1:])
 
 
-index_df = pd.read_csv(INDEX_CSV, engine="pyarrow", dtype_backend="pyarrow")
-index_names = index_df["index"].unique().tolist()
+@st.cache_data(show_spinner=False)
+def _load_index_csv(mtime: float) -> pd.DataFrame:
+    # keyed by mtime so edits to the CSV invalidate the cached frame
+    return pd.read_csv(
+        INDEX_CSV, engine="pyarrow", dtype_backend="pyarrow", usecols=["index"]
+    )
+
+
+@st.cache_data(show_spinner=False)
+def _index_names(mtime: float) -> list[str]:
+    return _load_index_csv(mtime)["index"].unique().tolist()
+
+
+@st.cache_data(ttl=60 * 60, show_spinner=False)
+def _current_month() -> int:
+    return pd.Timestamp.now().month
+
+
+index_names = _index_names(INDEX_CSV.stat().st_mtime)
 
 selected_index = st.sidebar.selectbox("Choose an index:", index_names, index=1)
 
-month_names = month_name[1:]
-current_month = pd.Timestamp.now().month
 selected_month_name = st.sidebar.selectbox(
-    "Choose a month:", month_names, index=current_month - 1
+    "Choose a month:", _MONTH_NAMES, index=_current_month() - 1
 )
 
 st.title("Top Performers in Index")
 st.write(f"### Selected Index: **{selected_index}**")
 st.write(f"### Selected Month: **{selected_month_name}**")
-month_num = month_names.index(selected_month_name) + 1
+month_num = _MONTH_NAMES.index(selected_month_name) + 1
 
 fig = generate_top_performers_barchart(selected_index, month_num)
 st.plotly_chart(
@@ -4,13 +4,17 @@ import pandas as pd
 import streamlit as st
 
 from price_action_analysis.binary_classification import print_monthly_max_up_down
+from price_action_analysis.config import DJIA_CSV, NASDAQ100_CSV, SP500_CSV
 from price_action_analysis.constants import MONTHS
 from price_action_analysis.data_loader import (
     df_to_csv_bytes,
     df_to_excel_bytes,
+    filter_years,
+    format_age,
     get_cache_path_for_sector,
     get_formatted_table,
     get_monthly_analysis,
+    get_monthly_percentages,
     get_sector_monthly_analysis,
     load_stock_metadata,
 )
@@ -21,21 +25,78 @@ from price_action_analysis.plots import (
     generate_sector_monthly_avg_barchart,
 )
 
+
+@st.cache_data(ttl=60 * 60, show_spinner=False)
+def _cached_monthly(ticker: str) -> pd.DataFrame:
+    return get_monthly_analysis(ticker)
+
+
+@st.cache_data(ttl=60 * 60, show_spinner=False)
+def _cached_sector(sector: str, force_refresh: bool = False) -> pd.DataFrame:
+    return get_sector_monthly_analysis(sector, force_refresh=force_refresh)
+
+
+@st.cache_data(ttl=60 * 60, show_spinner=False)
+def _prep_monthly(ticker: str, min_year: int, max_year: int) -> pd.DataFrame:
+    return get_monthly_percentages(_cached_monthly(ticker), min_year, max_year)
+
+
+@st.cache_data(ttl=60 * 60, show_spinner=False)
+def _prep_sector(sector: str, min_year: int, max_year: int) -> pd.DataFrame:
+    return get_monthly_percentages(_cached_sector(sector), min_year, max_year)
+
+
+@st.cache_data(ttl=60 * 60, show_spinner=False)
+def _cached_majority(data: pd.DataFrame) -> pd.Series:
+    return print_monthly_max_up_down(data)
+
+
+@st.cache_data(show_spinner=False)
+def _name_to_symbol(sector: str) -> dict[str, str]:
+    stock_df = load_stock_metadata()
+    if sector != "All Sectors":
+        stock_df = stock_df.query("sector == @sector")
+    return dict(zip(stock_df["company_name"], stock_df["symbol"]))
+
+
+@st.cache_data(show_spinner=False)
+def _sector_names() -> tuple[str, ...]:
+    return tuple(sorted(load_stock_metadata()["sector"].dropna().unique().tolist()))
+
+
+US_INDEX_CSVS = {
+    "DJIA": DJIA_CSV,
+    "S&P 500": SP500_CSV,
+    "NASDAQ-100": NASDAQ100_CSV,
+}
+
+
+@st.cache_data(show_spinner=False)
+def _load_index_csv(market: str) -> pd.DataFrame:
+    ticker_df = pd.read_csv(
+        US_INDEX_CSVS[market],
+        engine="pyarrow",
+        dtype_backend="pyarrow",
+        usecols=["company_name", "ticker"],
+    )
+    ticker_df["display_name"] = (
+        ticker_df["company_name"].astype(str)
+        + " ("
+        + ticker_df["ticker"].astype(str)
+        + ")"
+    )
+    return ticker_df
+
+
 market = st.sidebar.selectbox(
     "Choose :", ["NASDAQ-100", "S&P 500", "DJIA", "NSE"], index=0
 )
-st.set_page_config(layout="wide")
-
-if market == "DJIA":
-    ticker_df = pd.read_csv("data/us-indices/ranked_djia.csv")
-elif market == "S&P 500":
-    ticker_df = pd.read_csv("data/us-indices/ranked_sp500.csv")
-elif market == "NASDAQ-100":
-    ticker_df = pd.read_csv("data/us-indices/ranked_nasdaq100.csv")
+
+if market in US_INDEX_CSVS:
+    ticker_df = _load_index_csv(market)
 elif market == "NSE":
     ticker_df = load_stock_metadata()
-    sector_names = sorted(ticker_df["sector"].dropna().unique().tolist())
-    sector_names.insert(0, "All Sectors")
+    sector_names = ["All Sectors", *_sector_names()]
 
 if market == "NSE":
     selected_sector = st.sidebar.selectbox("Choose a sector:", sector_names, index=1)
@@ -54,9 +115,6 @@ if market == "NSE":
     )  # type: ignore
 
 if market in ["DJIA", "S&P 500", "NASDAQ-100"]:
-    ticker_df["display_name"] = ticker_df.apply(
-        lambda row: f"{row['company_name']} ({row['ticker']})", axis=1
-    )
     selected_display_name = st.sidebar.selectbox(
         "Choose a stock:",
         ticker_df["display_name"].tolist(),
@@ -77,9 +135,7 @@ if market == "NSE":
         selected_ticker = "SECTOR"  # type: ignore
         st.write(f"### Selected Sector: **{selected_sector}**")
     else:
-        selected_ticker = sector_df.set_index("company_name")["symbol"].get(
-            selected_ticker
-        )  # type: ignore
+        selected_ticker = _name_to_symbol(selected_sector)[selected_ticker]  # type: ignore
         st.write(f"### Selected Stock: **{selected_ticker}** `{selected_ticker}`")
 
     if selected_ticker == "SECTOR":
@@ -88,40 +144,24 @@ if market == "NSE":
 
         cache_path = get_cache_path_for_sector(str(selected_sector))  # type: ignore
 
-        def _format_age(delta_seconds: float) -> str:
-            if delta_seconds < 60:
-                return "just now"
-            if delta_seconds < 3600:
-                mins = int(delta_seconds // 60)
-                return f"{mins} min{'s' if mins != 1 else ''} ago"
-            if delta_seconds < 86400:
-                hours = delta_seconds / 3600
-                return f"{hours:.1f} h ago"
-            days = delta_seconds / 86400
-            return f"{days:.1f} d ago"
-
-        if cache_path.exists():
-            age = datetime.now(timezone.utc).timestamp() - cache_path.stat().st_mtime
-            cache_caption.caption(f"Last updated: {_format_age(age)}")
-        else:
-            cache_caption.caption("No cached sector data yet.")
-
         with st.spinner("Loading sector analysis (cached if available)..."):
             assert isinstance(selected_sector, str)
-            data = get_sector_monthly_analysis(
-                selected_sector, stock_df=ticker_df, force_refresh=False
-            )
+            data = _cached_sector(selected_sector)
 
-        if cache_path.exists():
-            age = datetime.now(timezone.utc).timestamp() - cache_path.stat().st_mtime
-            cache_caption.caption(f"Last updated: {_format_age(age)}")
+        try:
+            mtime = cache_path.stat().st_mtime
+        except FileNotFoundError:
+            cache_caption.caption("No cached sector data yet.")
+        else:
+            age = datetime.now(timezone.utc).timestamp() - mtime
+            cache_caption.caption(f"Last updated: {format_age(age)}")
 
     elif selected_ticker != "SECTOR":
-        data = get_monthly_analysis(selected_ticker)  # type: ignore
+        data = _cached_monthly(selected_ticker)  # type: ignore
 
 elif market in ["DJIA", "S&P 500", "NASDAQ-100"]:
     st.write(f"### Selected Stock: **{selected_ticker}** `{selected_ticker}`")
-    data = get_monthly_analysis(selected_ticker)  # type: ignore
+    data = _cached_monthly(selected_ticker)  # type: ignore
 
 min_year, max_year = data.index.min(), data.index.max()
 
@@ -140,9 +180,12 @@ elif min_year == max_year:
     st.write(f"**Data available for year :** {min_year}")
 
 
-data = data.filter(
-    items=[str(y) for y in range(selected_min_year, selected_max_year + 1)], axis=0
-)
+data = filter_years(data, selected_min_year, selected_max_year)
+if selected_ticker == "SECTOR":
+    prep = _prep_sector(selected_sector, selected_min_year, selected_max_year)  # type: ignore[arg-type]
+else:
+    prep = _prep_monthly(selected_ticker, selected_min_year, selected_max_year)
+
 tab1, tab2, tab3, tab4 = st.tabs(
     ["📄 Price Action Data", "🔥 Heatmap", "📊 Bar Chart", "📊 Logistic Regression"]
 )
@@ -174,17 +217,23 @@ with tab1:
 
 with tab2:
     st.subheader("Heatmap")
+    # per-cell labels bloat the figure for long year ranges; rely on hover there
+    show_text = (selected_max_year - selected_min_year + 1) * 12 <= 200
     if selected_ticker == "SECTOR":
         fig = generate_sector_heatmap(
             selected_sector,  # type: ignore[arg-type]
             min_year=selected_min_year,
             max_year=selected_max_year,
+            show_text=show_text,
+            monthly=prep,
         )
     else:
         fig = generate_heatmap(
             selected_ticker,
             min_year=selected_min_year,
             max_year=selected_max_year,
+            show_text=show_text,
+            monthly=prep,
         )
     fig.update_layout(
         height=600,
@@ -199,12 +248,14 @@ with tab3:
             selected_sector,  # type: ignore[arg-type]
             min_year=selected_min_year,
             max_year=selected_max_year,
+            monthly=prep,
         )
     else:
         fig = generate_monthly_avg_barchart(
             selected_ticker,
             min_year=selected_min_year,
             max_year=selected_max_year,
+            monthly=prep,
         )
     st.plotly_chart(fig, width="stretch", config={"scrollZoom": False})
 
@@ -212,12 +263,12 @@ with tab3:
 with tab4:
     st.subheader("Logistic Regression Results")
 
-    results = print_monthly_max_up_down(data)
-    # If results is a Series, convert to DataFrame for display
-    if isinstance(results, pd.Series):
-        results_df = results.loc[MONTHS].to_frame(name="Majority Direction")
-    else:
-        results_df = results.loc[MONTHS]
+    results_df = (
+        _cached_majority(data)
+        .reindex(MONTHS)
+        .rename_axis("Month")
+        .to_frame(name="Majority Direction")
+    )
     st.dataframe(results_df)
 
 if selected_ticker == "SECTOR":
@@ -225,9 +276,17 @@ if selected_ticker == "SECTOR":
     force_refresh_bottom = st.button("Force Refresh Sector Cache", type="primary")
     if force_refresh_bottom:
         with st.spinner("Refreshing sector cache..."):
-            data = get_sector_monthly_analysis(selected_sector, force_refresh=True)  # type: ignore[arg-type]
+            _cached_sector.clear()
+            _prep_sector.clear()
+            generate_sector_heatmap.clear()
+            generate_sector_monthly_avg_barchart.clear()
+            data = _cached_sector(selected_sector, force_refresh=True)  # type: ignore[arg-type]
 
         cache_path = get_cache_path_for_sector(str(selected_sector))
-        if cache_path.exists():
-            age = datetime.now(timezone.utc).timestamp() - cache_path.stat().st_mtime
-            cache_caption.caption(f"Last updated: {_format_age(age)} (just refreshed)")
+        try:
+            mtime = cache_path.stat().st_mtime
+        except FileNotFoundError:
+            pass
+        else:
+            age = datetime.now(timezone.utc).timestamp() - mtime
+            cache_caption.caption(f"Last updated: {format_age(age)} (just refreshed)")
@@ -1,75 +1,175 @@
+import hashlib
+import re
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
-from sklearn.linear_model import LogisticRegression
-from sklearn.model_selection import TimeSeriesSplit
 
+from price_action_analysis.config import MODEL_DIR
 from price_action_analysis.constants import MONTHS
 
+# part of the saved-model key; bump whenever _fit_logreg or its settings change
+# so pickles fitted by older code are not reused
+MODEL_VERSION = 2
+
 
 def prepare_classification_data(df: pd.DataFrame) -> pd.DataFrame:
     # Ensure index is named 'year' and reset
     if df.index.name != "year":
         df.index.name = "year"
+    # sector caches also carry annual/half-year summary columns
+    df = df.reindex(columns=MONTHS)
     df = df.reset_index().melt(id_vars="year", var_name="month", value_name="return")
     df = df.dropna(subset=["return"])
 
-    # target variable: 1 if return > 0 else 0
-    df["up"] = (df["return"] > 0).astype(int)
+    # month as numeric feature, read off the categorical codes
+    month_num = (
+        df["month"].astype(pd.CategoricalDtype(MONTHS, ordered=True)).cat.codes + 1
+    )
 
-    # month as numeric feature
-    month_map = {m: i + 1 for i, m in enumerate(MONTHS)}
-    df["month_num"] = df["month"].map(month_map)
+    # melt interleaves years within each month, so restore calendar order
+    # before taking lags
+    df = df.assign(month_num=month_num).sort_values(
+        ["year", "month_num"], kind="stable"
+    )
+    returns = df["return"].to_numpy(dtype=np.float64)
 
     # lag features (previous 1 and 2 months return)
-    df["return_lag1"] = df["return"].shift(1)
-    df["return_lag2"] = df["return"].shift(2)
+    return_lag1 = np.empty_like(returns)
+    return_lag1[:1] = np.nan
+    return_lag1[1:] = returns[:-1]
+    return_lag2 = np.empty_like(returns)
+    return_lag2[:2] = np.nan
+    return_lag2[2:] = returns[:-2]
+
+    out = pd.DataFrame(
+        {
+            "year": df["year"].to_numpy(),
+            "month": df["month"].to_numpy(),
+            "return": returns,
+            # target variable: 1 if return > 0 else 0
+            "up": (returns > 0).view(np.int8),
+            "month_num": df["month_num"].to_numpy(),
+            "return_lag1": return_lag1,
+            "return_lag2": return_lag2,
+        },
+        copy=False,
+    )
 
     # drop rows with missing lag features
-    return df.dropna()
+    return out.dropna()
 
 
-def train_classifier(df: pd.DataFrame, sector: str):
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-z))
+
+
+class LogisticModel:
+    """
+    Logistic regression weights with the bias term first.
+    """
+
+    def __init__(self, weights: np.ndarray):
+        self.weights = weights
+
+    def predict(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        return (_sigmoid(X @ self.weights[1:] + self.weights[0]) > 0.5).astype(int)
+
+
+def _fit_logreg(
+    X, y, l2: float = 1e-4, max_iter: int = 50, tol: float = 1e-10
+) -> LogisticModel:
+    """
+    Fit L2-regularized logistic regression with Newton (IRLS) steps.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    design = np.column_stack([np.ones(len(X)), X])
+
+    # month_num (1-12) and the lagged returns (~0.05) differ in scale by two
+    # orders of magnitude, which stalls plain gradient descent; Newton steps
+    # use the curvature and converge in a handful of iterations
+    penalty = np.full(design.shape[1], l2)
+    penalty[0] = 0.0  # the bias is not regularized
+
+    w = np.zeros(design.shape[1])
+    for _ in range(max_iter):
+        p = _sigmoid(design @ w)
+        grad = design.T @ (p - y) / len(y) + penalty * w
+        hess = (design.T * (p * (1.0 - p))) @ design / len(y) + np.diag(penalty)
+        step = np.linalg.solve(hess, grad)
+        w -= step
+        if np.max(np.abs(step)) < tol:
+            break
+
+    return LogisticModel(w)
+
+
+def get_model_path(sector: str, data_hash: str) -> Path:
+    MODEL_DIR.mkdir(parents=True, exist_ok=True)
+    safe_sector_name = re.sub(r"[^A-Za-z0-9_-]+", "_", sector.strip())
+
+    return MODEL_DIR / f"{safe_sector_name}_{data_hash}.pkl"
+
+
+def train_classifier(df: pd.DataFrame, sector: str) -> LogisticModel:
     """
     Train and evaluate a simple Logistic Regression binary classifier.
     """
-    X = df[["month_num", "return_lag1", "return_lag2"]]
-    y = df["up"]
+    # imported here so pages that only need print_monthly_max_up_down
+    # don't pay for loading sklearn/joblib
+    import joblib
+    from sklearn.model_selection import TimeSeriesSplit
+
+    X = df[["month_num", "return_lag1", "return_lag2"]].to_numpy(
+        dtype=np.float64, copy=True
+    )
+    y = df["up"].to_numpy(dtype=np.float64)
+
+    # reuse the model fitted on identical inputs
+    data_hash = hashlib.blake2b(
+        f"v{MODEL_VERSION}".encode() + X.tobytes() + y.tobytes(), digest_size=8
+    ).hexdigest()
+    model_path = get_model_path(sector, data_hash)
+    if model_path.exists():
+        try:
+            return joblib.load(model_path)
+        except Exception:
+            model_path.unlink(missing_ok=True)
 
     tscv = TimeSeriesSplit(n_splits=5)
 
     for fold, (train_idx, test_idx) in enumerate(tscv.split(X), 1):
-        X_train, X_test = X.iloc[train_idx], X.iloc[test_idx]
-        y_train, _y_test = y.iloc[train_idx], y.iloc[test_idx]
+        X_train, X_test = X[train_idx], X[test_idx]
+        y_train, _y_test = y[train_idx], y[test_idx]
 
-        clf = LogisticRegression(random_state=42, max_iter=1000)
-        clf.fit(X_train, y_train)
+        clf = _fit_logreg(X_train, y_train)
         clf.predict(X_test)
 
     # save final model on all data
-    final_model = LogisticRegression(random_state=42, max_iter=1000)
-    final_model.fit(X, y)
+    final_model = _fit_logreg(X, y)
 
-    # print_up_down(sector)
-    print_monthly_max_up_down(sector) # type: ignore
+    try:
+        joblib.dump(final_model, model_path)
+    except Exception:
+        pass
 
     return final_model
 
 
 def print_monthly_max_up_down(df: pd.DataFrame):
-    # Ensure index is named 'year' and reset
-    if df.index.name != "year":
-        df.index.name = "year"
-    df = df.reset_index().melt(id_vars="year", var_name="month", value_name="return")
-    df = df.dropna(subset=["return"])
-
-    # label each month as Up or Down
-    df["direction"] = df["return"].apply(lambda r: "Up" if r > 0 else "Down")
-
-    # group by month across all years and count Up vs Down
-    counts = df.groupby("month")["direction"].value_counts().unstack(fill_value=0)
-
-    # decide majority direction for each month
-    majority = counts.apply(
-        lambda row: "Up" if row.get("Up", 0) > row.get("Down", 0) else "Down", axis=1
+    # count Up months (return > 0) and Down months (return <= 0) across years,
+    # straight on the wide year x month matrix
+    returns = df.reindex(columns=MONTHS).to_numpy(dtype=np.float64, na_value=np.nan)
+    up = (returns > 0).sum(axis=0)
+    down = (returns <= 0).sum(axis=0)
+
+    # decide majority direction for each month; months without any
+    # observations stay empty rather than defaulting to "Down"
+    majority = pd.Series(
+        np.where(up + down == 0, None, np.where(up > down, "Up", "Down")),
+        index=MONTHS,
     )
 
     return majority
@@ -2,8 +2,12 @@ from pathlib import Path
 
 PROJECT_ROOT: Path = Path(__file__).resolve().parents[2]
 DATA_DIR: Path = PROJECT_ROOT / "data"
+MODEL_DIR: Path = PROJECT_ROOT / "models"
 SECTOR_DIR: Path = DATA_DIR / "sector-analysis"
+TICKER_DIR: Path = DATA_DIR / "tickers"
+FORMATTED_DIR: Path = DATA_DIR / "formatted"
 INDEX_DIR: Path = DATA_DIR / "index-analysis"
+US_INDEX_DIR: Path = DATA_DIR / "us-indices"
 
 STOCK_METADATA = DATA_DIR / "combined.parquet"
 
@@ -11,10 +15,18 @@ INDEX_CSV = INDEX_DIR / "nifty_sectoral_indices.csv"
 
 NIFTY_50_CSV = INDEX_DIR / "nifty_50.csv"
 
+DJIA_CSV = US_INDEX_DIR / "ranked_djia.csv"
+SP500_CSV = US_INDEX_DIR / "ranked_sp500.csv"
+NASDAQ100_CSV = US_INDEX_DIR / "ranked_nasdaq100.csv"
+
 if __name__ == "__main__":
     print(f"PROJECT_ROOT: {PROJECT_ROOT}")
     print(f"DATA_DIR: {DATA_DIR}")
+    print(f"MODEL_DIR: {MODEL_DIR}")
     print(f"SECTOR_DIR: {SECTOR_DIR}")
+    print(f"TICKER_DIR: {TICKER_DIR}")
+    print(f"FORMATTED_DIR: {FORMATTED_DIR}")
     print(f"INDEX_DIR: {INDEX_DIR}")
+    print(f"US_INDEX_DIR: {US_INDEX_DIR}")
     print(f"STOCK_METADATA: {STOCK_METADATA}")
     print(f"INDEX_CSV: {INDEX_CSV}")
\ No newline at end of file
@@ -1,16 +1,41 @@
 import asyncio
+import hashlib
 import io
 import re
+import threading
+import time
+import warnings
+from functools import lru_cache, reduce
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
 import streamlit as st
 import yfinance as yf
+from openpyxl import Workbook
 
-from .config import SECTOR_DIR, STOCK_METADATA
+from .config import FORMATTED_DIR, SECTOR_DIR, STOCK_METADATA, TICKER_DIR
 from .constants import MONTHS
 
+try:
+    from numba import njit
+except ImportError:  # numba is optional; fall back to the NumPy scatter
+    njit = None
+
+TICKER_CACHE_TTL = 24 * 60 * 60
+FORMATTED_CACHE_TTL = 24 * 60 * 60
+
+# part of the formatted-table cache key; bump whenever _compute_formatted_table
+# changes so files written by older code are not served
+FORMATTED_CACHE_VERSION = 1
+
+# Process-wide cap on concurrent yfinance calls, shared by every caller (and
+# every Streamlit session) so bursts don't trip rate limits. A batched
+# download holds one slot even though yfinance fans it out over threads.
+_DL_SEM = threading.BoundedSemaphore(8)
+
 
 def get_cache_path_for_sector(sector: str) -> Path:
     SECTOR_DIR.mkdir(parents=True, exist_ok=True)
@@ -19,78 +44,281 @@ def get_cache_path_for_sector(sector: str) -> Path:
     return SECTOR_DIR / f"{safe_sector_name}.parquet"
 
 
-def load_stock_metadata() -> pd.DataFrame:
-    return pd.read_parquet(STOCK_METADATA, engine="pyarrow", dtype_backend="pyarrow")
+def get_cache_path_for_ticker(ticker: str) -> Path:
+    TICKER_DIR.mkdir(parents=True, exist_ok=True)
+    safe_ticker_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", ticker.strip())
+
+    return TICKER_DIR / f"{safe_ticker_name}.parquet"
+
+
+def format_age(delta_seconds: float) -> str:
+    if delta_seconds < 60:
+        return "just now"
+    if delta_seconds < 3600:
+        mins = int(delta_seconds // 60)
+        return f"{mins} min{'s' if mins != 1 else ''} ago"
+    if delta_seconds < 86400:
+        hours = delta_seconds / 3600
+        return f"{hours:.1f} h ago"
+    days = delta_seconds / 86400
+    return f"{days:.1f} d ago"
+
+
+@st.cache_resource
+def load_stock_metadata(sector: str | None = None) -> pd.DataFrame:
+    return pd.read_parquet(
+        STOCK_METADATA,
+        engine="pyarrow",
+        dtype_backend="pyarrow",
+        columns=["symbol", "company_name", "sector"],
+        filters=None if sector is None else [("sector", "=", sector)],
+    )
 
 
 def download_closing_data(ticker: str) -> pd.Series:
-    closing_data = yf.download(
-        ticker,
-        period="max",
-        multi_level_index=False,
-        auto_adjust=True,
-        progress=False,
-    )["Close"]  # type: ignore
+    with _DL_SEM:
+        closing_data = yf.download(
+            ticker,
+            period="max",
+            multi_level_index=False,
+            auto_adjust=True,
+            progress=False,
+        )["Close"]  # type: ignore
+
+    return closing_data
+
+
+def download_closing_data_batch(tickers: list[str]) -> pd.DataFrame:
+    with _DL_SEM:
+        closing_data = yf.download(
+            tickers,
+            period="max",
+            auto_adjust=True,
+            progress=False,
+            threads=True,
+        )["Close"]  # type: ignore
 
     return closing_data
 
 
+def read_ticker_cache(
+    ticker: str, max_age: float = TICKER_CACHE_TTL
+) -> pd.Series | None:
+    cache_path = get_cache_path_for_ticker(ticker)
+
+    try:
+        if time.time() - cache_path.stat().st_mtime > max_age:
+            return None
+        return pd.read_parquet(cache_path, engine="pyarrow", columns=["close"])["close"]
+    except Exception:
+        return None
+
+
+def write_ticker_cache(ticker: str, closing_data: pd.Series) -> None:
+    if closing_data.empty:
+        return
+
+    try:
+        closing_data.to_frame("close").to_parquet(
+            get_cache_path_for_ticker(ticker), engine="pyarrow", compression="zstd"
+        )
+    except Exception:
+        pass
+
+
+def load_closing_data(ticker: str, max_age: float = TICKER_CACHE_TTL) -> pd.Series:
+    closing_data = read_ticker_cache(ticker, max_age=max_age)
+    if closing_data is None:
+        closing_data = download_closing_data(ticker)
+        write_ticker_cache(ticker, closing_data)
+
+    return closing_data
+
+
+def load_closing_data_batch(
+    tickers: list[str], max_age: float = TICKER_CACHE_TTL
+) -> dict[str, pd.Series]:
+    closing_data = {ticker: read_ticker_cache(ticker, max_age) for ticker in tickers}
+
+    # one batched request for everything that is not cached on disk
+    missing = [ticker for ticker, data in closing_data.items() if data is None]
+    if missing:
+        prices = download_closing_data_batch(missing)
+        for ticker in missing:
+            if ticker not in prices:
+                continue
+            closing_data[ticker] = prices[ticker].dropna()
+            write_ticker_cache(ticker, closing_data[ticker])  # type: ignore[arg-type]
+
+    return {
+        ticker: data
+        for ticker, data in closing_data.items()
+        if data is not None and not data.empty
+    }
+
+
 def calc_annual_return(monthly_returns: pd.Series):
     return monthly_returns.add(1, fill_value=0.0).prod() - 1.0  # type: ignore
 
 
-def add_avg_monthly_return(df: pd.DataFrame):
-    avg_monthly_returns = (
-        df[MONTHS].mean(axis=0).rename("monthly_avg").to_frame().transpose()
+def _nanmean(values: np.ndarray, axis: int) -> np.ndarray:
+    # all-NaN slices are expected for months without data and should stay NaN
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        return np.nanmean(values, axis=axis)
+
+
+def get_avg_monthly_returns(df: pd.DataFrame) -> pd.Series:
+    months = df.loc[:, MONTHS]
+    return pd.Series(
+        _nanmean(months.to_numpy(np.float64), axis=0),
+        index=months.columns,
+        name="monthly_avg",
     )
+
+
+def add_avg_monthly_return(df: pd.DataFrame):
+    avg_monthly_returns = get_avg_monthly_returns(df).to_frame().transpose()
     return pd.concat([df, avg_monthly_returns])
 
 
+def _average_monthly_frames(frames: list[pd.DataFrame]) -> pd.DataFrame:
+    years = reduce(pd.Index.union, (df.index for df in frames)).rename("year")
+    stacked = np.stack(
+        [df.reindex(index=years, columns=MONTHS).to_numpy(np.float64) for df in frames]
+    )
+
+    return pd.DataFrame(_nanmean(stacked, axis=0), index=years, columns=MONTHS)
+
+
+def _fill_monthly_numpy(
+    periods: np.ndarray, last_close: np.ndarray, out: np.ndarray, year0: int
+) -> None:
+    out[periods[1:] // 12 - year0, periods[1:] % 12] = (
+        last_close[1:] / last_close[:-1] - 1.0
+    )
+
+
+if njit is not None:
+
+    @njit(cache=True)
+    def _fill_monthly(periods, last_close, out, year0):
+        for i in range(1, len(last_close)):
+            out[periods[i] // 12 - year0, periods[i] % 12] = (
+                last_close[i] / last_close[i - 1] - 1.0
+            )
+
+else:
+    _fill_monthly = _fill_monthly_numpy
+
+
 def get_monthly_analysis(
     ticker: str,
     stock_data: pd.Series | None = None,
 ) -> pd.DataFrame:
     if stock_data is None:
-        stock_data = download_closing_data(ticker)
+        stock_data = load_closing_data(ticker)
 
-    return (
-        stock_data.to_frame("close")
-        .resample("ME")
-        .last()
-        .assign(
-            month=lambda df_: df_.index.strftime("%b"),  # type: ignore
-            year=lambda df_: df_.index.strftime("%Y"),  # type: ignore
-            monthly_returns=lambda df_: df_["close"].pct_change(),
-        )
-        .astype({"month": pd.CategoricalDtype(MONTHS, ordered=True)})
-        .pivot_table(
-            index="year", columns="month", values="monthly_returns", observed=True
+    stock_data = stock_data.dropna()
+    if not stock_data.index.is_monotonic_increasing:
+        stock_data = stock_data.sort_index()
+
+    if stock_data.empty:
+        return pd.DataFrame(
+            index=pd.Index([], dtype=np.int16, name="year"),
+            columns=pd.Index(MONTHS, name="month"),
+            dtype=np.float64,
         )
-        .reindex(columns=MONTHS)
+
+    dates = stock_data.index
+    if dates.tz is not None:  # type: ignore[attr-defined]
+        dates = dates.tz_localize(None)  # type: ignore[attr-defined]
+
+    # months since 1970-01 for every row; the last row of each run is a month end
+    periods = dates.to_period("M").asi8  # type: ignore[attr-defined]
+    month_ends = np.r_[np.flatnonzero(np.diff(periods)), len(periods) - 1]
+    last_close = stock_data.to_numpy(dtype=np.float64)[month_ends]
+    periods = periods[month_ends]
+
+    # periods count months from 1970-01, so // 12 and % 12 give year and month
+    year0, year_n = periods[0] // 12, periods[-1] // 12
+    analysis = np.full((year_n - year0 + 1, len(MONTHS)), np.nan)
+    _fill_monthly(periods, last_close, analysis, year0)
+
+    # drop years without a single return, e.g. a listing in December
+    has_data = ~np.isnan(analysis).all(axis=1)
+    return pd.DataFrame(
+        analysis[has_data],
+        index=pd.Index(
+            np.arange(year0 + 1970, year_n + 1971)[has_data], dtype=np.int16, name="year"
+        ),
+        columns=pd.Index(MONTHS, name="month"),
     )
 
 
-def get_sector_monthly_analysis(
-    sector: str,
-    stock_df: pd.DataFrame | None = None,
-    use_cache: bool = True,
-    force_refresh: bool = False,
-    max_concurrency: int = 8,
-) -> pd.DataFrame:  # type: ignore
-    if stock_df is None:
-        stock_df = load_stock_metadata()
+def _get_monthly_analyses(
+    closing_data: dict[str, pd.Series],
+) -> dict[str, pd.DataFrame]:
+    monthly_analyses: dict[str, pd.DataFrame] = {}
+    for ticker, stock_data in closing_data.items():
+        try:
+            analysis = get_monthly_analysis(ticker, stock_data=stock_data)
+        except Exception:
+            continue
+        if not analysis.empty:
+            monthly_analyses[ticker] = analysis[MONTHS]
+
+    return monthly_analyses
+
+
+def _with_int_years(df: pd.DataFrame) -> pd.DataFrame:
+    return df.set_axis(df.index.astype(np.int16), axis="index").sort_index()
+
 
-    cache_path = get_cache_path_for_sector(sector)
+def _year_mask(df: pd.DataFrame, min_year: int, max_year: int) -> np.ndarray:
+    years = df.index.astype(np.int32)
+    return (years >= min_year) & (years <= max_year)
 
-    if use_cache and not force_refresh and cache_path.exists():
+
+def filter_years(df: pd.DataFrame, min_year: int, max_year: int) -> pd.DataFrame:
+    return df.loc[_year_mask(df, min_year, max_year)]
+
+
+def get_monthly_percentages(
+    df: pd.DataFrame, min_year: int, max_year: int
+) -> pd.DataFrame:
+    """Jan-Dec returns for the selected years, as percentages rounded to 2dp."""
+    mask = _year_mask(df, min_year, max_year)
+    raw = df.loc[mask, MONTHS].to_numpy(dtype=np.float64, na_value=np.nan)
+
+    return pd.DataFrame(
+        np.round(raw * 100.0, 2),
+        index=df.index[mask],
+        columns=pd.Index(MONTHS, name="month"),
+    )
+
+
+@lru_cache(maxsize=64)
+def _load_cached_sector(cache_path: Path, mtime_ns: int) -> pd.DataFrame:
+    # keyed on the file's mtime so rewrites by another process (e.g. the
+    # reload-sector-cache command) are picked up; misses raise instead of
+    # returning None so lru_cache never remembers them
+    try:
+        # older caches were written with string year labels
+        return _with_int_years(pd.read_parquet(cache_path, engine="pyarrow"))
+    except FileNotFoundError:
+        raise
+    except Exception:
         try:
-            return pd.read_parquet(cache_path, engine="pyarrow")
+            cache_path.unlink(missing_ok=True)  # type: ignore[arg-type]
         except Exception:
-            try:
-                cache_path.unlink(missing_ok=True)  # type: ignore[arg-type]
-            except Exception:
-                pass
+            pass
+        raise
+
 
+def _compute_sector_monthly_analysis(
+    sector: str, stock_df: pd.DataFrame, max_age: float = TICKER_CACHE_TTL
+) -> pd.DataFrame:
     tickers = (
         stock_df.loc[stock_df["sector"] == sector, "symbol"].dropna().unique().tolist()
     )
@@ -98,63 +326,44 @@ def get_sector_monthly_analysis(
     if not tickers:
         raise ValueError(f"No symbols found for sector '{sector}'")
 
-    async def _fetch(ticker: str):
-        try:
-            analysis = await asyncio.to_thread(get_monthly_analysis, ticker)
-            if analysis is None or analysis.empty:
-                return None
-            return ticker, analysis[MONTHS]
-
-        except Exception:
-            return None
-
-    async def _gather():
-        sem = asyncio.Semaphore(max_concurrency)
+    stock_monthly_results = list(
+        _get_monthly_analyses(load_closing_data_batch(tickers, max_age)).values()
+    )
 
-        async def _bounded(ticker: str):
-            async with sem:
-                return await _fetch(ticker)
+    if not stock_monthly_results:
+        raise ValueError(f"Unable to build monthly data for sector '{sector}'")
 
-        tasks = [asyncio.create_task(_bounded(s)) for s in tickers]
-        return await asyncio.gather(*tasks)
+    return _average_monthly_frames(stock_monthly_results)
 
-    try:
-        results = asyncio.run(_gather())
-    except RuntimeError:
-        # Fallback to iterative solution for environments with existing event loop
-        results = []
-        for ticker in tickers:
-            try:
-                analysis = get_monthly_analysis(ticker)
-                if analysis is not None and not analysis.empty:
-                    results.append((ticker, analysis[MONTHS]))
-            except Exception:
-                continue
 
-    stock_monthly_results: list[pd.DataFrame] = []
-    retrieved_tickers: list[str] = []
-    for r in results:  # type: ignore
-        if not r:
-            continue
-        ticker, analysis = r
-        stock_monthly_results.append(analysis)
-        retrieved_tickers.append(ticker)
+def get_sector_monthly_analysis(
+    sector: str,
+    stock_df: pd.DataFrame | None = None,
+    use_cache: bool = True,
+    force_refresh: bool = False,
+) -> pd.DataFrame:  # type: ignore
+    if use_cache and not force_refresh:
+        cache_path = get_cache_path_for_sector(sector)
+        try:
+            return _load_cached_sector(cache_path, cache_path.stat().st_mtime_ns)
+        except Exception:
+            pass
 
-    if not stock_monthly_results:
-        raise ValueError(f"Unable to build monthly data for sector '{sector}'")
+    if stock_df is None:
+        stock_df = load_stock_metadata(sector)
 
-    combined = pd.concat(
-        stock_monthly_results, keys=retrieved_tickers, names=["symbol", "year"]
-    )  # type: ignore[arg-type]
-    sector_monthly = combined.groupby("year").mean(numeric_only=True)
-    result = sector_monthly.reindex(columns=MONTHS)
+    # a forced refresh re-downloads prices instead of reusing the ticker cache
+    result = _compute_sector_monthly_analysis(
+        sector, stock_df, max_age=0 if force_refresh else TICKER_CACHE_TTL
+    )
 
     # Write cache
     if use_cache:
         try:
-            result.to_parquet(cache_path, engine="pyarrow")
+            result.to_parquet(get_cache_path_for_sector(sector), engine="pyarrow")
         except Exception:
             pass
+        _load_cached_sector.cache_clear()
 
     return result
 
@@ -165,36 +374,49 @@ def force_rewrite_all_sector_caches(
     if stock_df is None:
         stock_df = load_stock_metadata()
 
-    sectors_series = stock_df.get("sector")
+    symbols = stock_df[["symbol", "sector"]].dropna()
+    symbols = symbols.assign(sector=symbols["sector"].astype(str).str.strip())
+    symbols = symbols[symbols["sector"] != ""]
 
-    sectors = sectors_series.dropna().astype(str).str.strip()  # type: ignore
-    sectors = sectors[sectors != ""].unique().tolist()
+    # one batched download for every ticker, however many sectors list it
+    all_tickers = symbols["symbol"].unique().tolist()
+    ticker_monthly = _get_monthly_analyses(
+        load_closing_data_batch(all_tickers, max_age=0)
+    )
 
     status: dict[str, str] = {}
-    for sector in sorted(sectors):
+    for sector, sector_symbols in symbols.groupby("sector")["symbol"]:
+        frames = [
+            ticker_monthly[ticker]
+            for ticker in sector_symbols.unique()
+            if ticker in ticker_monthly
+        ]
+        if not frames:
+            status[sector] = f"error: Unable to build monthly data for sector '{sector}'"
+            continue
+
         try:
-            _ = get_sector_monthly_analysis(
-                sector,
-                stock_df=stock_df,
-                use_cache=False,
-                force_refresh=True,
+            _average_monthly_frames(frames).to_parquet(
+                get_cache_path_for_sector(sector), engine="pyarrow"
             )
             status[sector] = "ok"
         except Exception as e:
             status[sector] = f"error: {e}"
 
+    _load_cached_sector.cache_clear()
+
     return status
 
 
-@st.cache_data(ttl=60 * 60)
-def get_formatted_table(analysis: pd.DataFrame):
+def _compute_formatted_table(analysis: pd.DataFrame) -> pd.DataFrame:
+    monthly_returns = analysis.loc[:, "Jan":"Dec"].to_numpy(dtype=np.float64)
+
     return (
         analysis.assign(
-            annual_returns=lambda df_: df_.loc[:, "Jan":"Dec"].agg(
-                calc_annual_return, axis=1
-            ),
-            first_half_avg=lambda df_: df_.loc[:, "Jan":"Jun"].mean(axis=1),
-            second_half_avg=lambda df_: df_.loc[:, "Jul":"Dec"].mean(axis=1),
+            # missing months compound as a 0% return, like calc_annual_return
+            annual_returns=np.nanprod(1.0 + monthly_returns, axis=1) - 1.0,
+            first_half_avg=_nanmean(monthly_returns[:, :6], axis=1),
+            second_half_avg=_nanmean(monthly_returns[:, 6:], axis=1),
         )[
             [
                 *MONTHS[:6],
@@ -205,6 +427,8 @@ def get_formatted_table(analysis: pd.DataFrame):
             ]
         ]
         .pipe(add_avg_monthly_return)
+        # integer years next to the summary label would leave a mixed-type index
+        .rename(index=str)
         .rename(
             columns={
                 "annual_returns": "Total Annual Returns",
@@ -220,6 +444,54 @@ def get_formatted_table(analysis: pd.DataFrame):
     )
 
 
+def get_cache_path_for_formatted_table(analysis: pd.DataFrame) -> Path:
+    FORMATTED_DIR.mkdir(parents=True, exist_ok=True)
+    key = hashlib.blake2b(
+        f"v{FORMATTED_CACHE_VERSION}".encode()
+        + pd.util.hash_pandas_object(analysis, index=True).to_numpy().tobytes(),
+        digest_size=8,
+    ).hexdigest()
+
+    return FORMATTED_DIR / f"{key}.parquet"
+
+
+def _prune_formatted_tables(max_age: float = FORMATTED_CACHE_TTL) -> None:
+    # every ticker and year range gets its own file, so drop the expired ones
+    cutoff = time.time() - max_age
+    for path in FORMATTED_DIR.glob("*.parquet"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+        except Exception:
+            pass
+
+
+@st.cache_data(ttl=60 * 60)
+def get_formatted_table(analysis: pd.DataFrame) -> pd.DataFrame:
+    cache_path = get_cache_path_for_formatted_table(analysis)
+
+    try:
+        if time.time() - cache_path.stat().st_mtime <= FORMATTED_CACHE_TTL:
+            return pd.read_parquet(cache_path, engine="pyarrow")
+    except FileNotFoundError:
+        pass
+    except Exception:
+        try:
+            cache_path.unlink(missing_ok=True)
+        except Exception:
+            pass
+
+    formatted = _compute_formatted_table(analysis)
+
+    _prune_formatted_tables()
+    try:
+        formatted.to_parquet(cache_path, engine="pyarrow")
+    except Exception:
+        pass
+
+    return formatted
+
+
 async def get_index_heatmap_data(
     index_data_csv: str | Path, interval: str = "1d"
 ) -> pd.DataFrame:
@@ -239,10 +511,11 @@ async def get_index_heatmap_data(
 
         def fetch() -> pd.Series:
             try:
-                info = yf.Ticker(ticker).fast_info
-                market_cap = info.get("marketCap")
+                with _DL_SEM:
+                    info = yf.Ticker(ticker).fast_info
+                    market_cap = info.get("marketCap")
 
-                returns = get_returns(info, interval="1d")
+                    returns = get_returns(info, interval="1d")
 
                 return pd.Series(
                     {
@@ -289,14 +562,34 @@ async def get_index_heatmap_data(
     return index_stock_data
 
 
+@st.cache_data(ttl=60 * 60, show_spinner=False)
 def df_to_csv_bytes(df: pd.DataFrame) -> bytes:
-    return df.to_csv(index=True).encode("utf-8")
+    # the index mixes year numbers and summary labels, so write it as text
+    table = pa.Table.from_pandas(
+        df.set_axis(df.index.astype(str), axis="index").reset_index(
+            names=df.index.name or ""
+        ),
+        preserve_index=False,
+    )
+    buf = pa.BufferOutputStream()
+    pacsv.write_csv(table, buf)
+    return buf.getvalue().to_pybytes()
 
 
+@st.cache_data(ttl=60 * 60, show_spinner=False)
 def df_to_excel_bytes(df: pd.DataFrame) -> bytes:
+    # write-only workbooks stream rows out instead of keeping a cell object
+    # per value in memory
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Analysis")
+    sheet.append([df.index.name or "", *map(str, df.columns)])
+
+    rows = df.astype(object).where(df.notna(), None).to_numpy().tolist()
+    for label, row in zip(df.index.tolist(), rows):
+        sheet.append([label, *row])
+
     buf = io.BytesIO()
-    with pd.ExcelWriter(buf, engine="xlsxwriter") as writer:
-        df.to_excel(writer, sheet_name="Analysis", index=True)
+    workbook.save(buf)
     return buf.getvalue()
 
 
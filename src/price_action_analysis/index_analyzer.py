@@ -1,7 +1,7 @@
 import pandas as pd
-import yfinance as yf
 
 from .config import INDEX_CSV
+from .data_loader import download_closing_data_batch
 
 
 def get_top_performers(
@@ -12,25 +12,24 @@ def get_top_performers(
     index_df: pd.DataFrame | None = None,
 ) -> pd.Series:
     if index_df is None:
-        index_df = pd.read_csv(INDEX_CSV, engine="pyarrow", dtype_backend="pyarrow")
+        index_df = pd.read_csv(
+            INDEX_CSV,
+            engine="pyarrow",
+            dtype_backend="pyarrow",
+            usecols=["index", "ticker"],
+        )
 
     stocks = index_df[index_df["index"] == index]["ticker"].to_list()
-    stocks_df = yf.download(
-        stocks,
-        period="max",
-        auto_adjust=True,
-        progress=False,
-    )["Close"]  # type: ignore
+    stocks_df = download_closing_data_batch(stocks)
 
-    top_performers = (
-        stocks_df.resample("ME")
-        .last()
-        .pct_change()
-        .query(
-            "index.dt.month == @month_num & (index.dt.year >= @min_year & index.dt.year <= @max_year)"
-        )  # type: ignore
-        .idxmax(axis=1)
-        .value_counts()
+    monthly_returns = stocks_df.resample("ME").last().pct_change()
+
+    months = monthly_returns.index
+    mask = (
+        (months.month == month_num)
+        & (months.year >= min_year)
+        & (months.year <= max_year)
     )
+    top_performers = monthly_returns.loc[mask].idxmax(axis=1).value_counts()
 
     return top_performers
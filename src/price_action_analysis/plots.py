@@ -1,42 +1,46 @@
+import warnings
 from calendar import month_name
 
 import numpy as np
 import pandas as pd
 import plotly.express as px
+import streamlit as st
 
-from .constants import MONTHS
 from .data_loader import (
-    add_avg_monthly_return,
+    get_avg_monthly_returns,
     get_monthly_analysis,
+    get_monthly_percentages,
     get_sector_monthly_analysis,
 )
 from .index_analyzer import get_top_performers
 
 
+def _robust_abs_max(values: np.ndarray) -> float:
+    # 95th percentile of |returns| so a few outliers don't wash out the scale
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        max_abs = np.nanquantile(np.abs(values), 0.95)
+    if not np.isfinite(max_abs) or max_abs <= 0:
+        return 100.0
+    return float(max_abs)
+
+
+@st.cache_data(ttl=60 * 60, show_spinner=False)
 def generate_heatmap(
     ticker: str,
     min_year: int = 1900,
     max_year: int = 2100,
+    show_text: bool = True,
+    monthly: pd.DataFrame | None = None,
 ):
-    monthly = (
-        get_monthly_analysis(ticker)
-        .filter(items=[str(y) for y in range(min_year, max_year + 1)], axis="index")
-        .loc[:, MONTHS]
-        .mul(100)
-        .round(2)
-    )
+    if monthly is None:
+        monthly = get_monthly_percentages(
+            get_monthly_analysis(ticker), min_year, max_year
+        )
 
     diverging_scale = [(0.0, "#b22222"), (0.5, "#fffdd0"), (1.0, "#006400")]
 
-    values = monthly.to_numpy(dtype=float)
-    abs_values = np.abs(values)
-    abs_values = abs_values[np.isfinite(abs_values)]
-    if abs_values.size:
-        max_abs = float(np.quantile(abs_values, 0.95))
-    else:
-        max_abs = 100.0
-    if not np.isfinite(max_abs) or max_abs <= 0:
-        max_abs = 100.0
+    max_abs = _robust_abs_max(monthly.to_numpy(dtype=float))
 
     fig = px.imshow(
         monthly,
@@ -46,11 +50,11 @@ def generate_heatmap(
         zmax=max_abs,
         origin="upper",
         aspect="auto",
-        text_auto=".2f",  # type: ignore
+        text_auto=".2f" if show_text else False,  # type: ignore
         labels=dict(month="Month", year="Year", color="Return (%)"),
     )
     fig.update_xaxes(title="")
-    fig.update_yaxes(title="Year")
+    fig.update_yaxes(title="Year", type="category")
     fig.update_layout(
         title=f"Historical Monthly Returns of {ticker}",
         coloraxis_colorbar_ticksuffix="%",
@@ -58,17 +62,19 @@ def generate_heatmap(
     return fig
 
 
+@st.cache_data(ttl=60 * 60, show_spinner=False)
 def generate_monthly_avg_barchart(
-    ticker: str, min_year: int = 1900, max_year: int = 2100
+    ticker: str,
+    min_year: int = 1900,
+    max_year: int = 2100,
+    monthly: pd.DataFrame | None = None,
 ):
-    res = (
-        get_monthly_analysis(ticker)
-        .filter(items=[str(y) for y in range(min_year, max_year + 1)], axis="index")
-        .mul(100)
-        .round(2)
-        .pipe(add_avg_monthly_return)
-        .loc["monthly_avg", MONTHS]
-    )  # type: ignore
+    if monthly is None:
+        monthly = get_monthly_percentages(
+            get_monthly_analysis(ticker), min_year, max_year
+        )
+
+    res = get_avg_monthly_returns(monthly)
 
     fig = px.bar(
         x=res.index,
@@ -77,59 +83,42 @@ def generate_monthly_avg_barchart(
         title=f"Average Monthly Returns for {ticker}",
         color=res.values,
         color_continuous_scale="RdYlGn",
-        text=res.apply(lambda x: f"{x:.2f}%"),
+        text=[f"{v:.2f}%" for v in res.values],
     )
     return fig
 
 
+@st.cache_data(ttl=60 * 60, show_spinner=False)
 def generate_sector_heatmap(
     sector: str,
     *,
     min_year: int = 1900,
     max_year: int = 2100,
     use_cache: bool = True,
-    force_refresh: bool = False,
+    show_text: bool = True,
+    monthly: pd.DataFrame | None = None,
 ) -> px.imshow:  # type: ignore
-    sector_df = get_sector_monthly_analysis(
-        sector,
-        use_cache=use_cache,
-        force_refresh=force_refresh,
-    )
-
-    filtered = (
-        sector_df.filter(
-            items=[str(y) for y in range(min_year, max_year + 1)], axis="index"
-        )
-        .loc[:, MONTHS]
-        .mul(100)
-        .round(2)
-    )
+    if monthly is None:
+        sector_df = get_sector_monthly_analysis(sector, use_cache=use_cache)
+        monthly = get_monthly_percentages(sector_df, min_year, max_year)
 
     diverging_scale = [(0.0, "#b22222"), (0.5, "#fffdd0"), (1.0, "#006400")]
 
-    values = filtered.to_numpy(dtype=float)
-    abs_values = np.abs(values)
-    abs_values = abs_values[np.isfinite(abs_values)]
-    if abs_values.size:
-        max_abs = float(np.quantile(abs_values, 0.95))
-    else:
-        max_abs = 100.0
-    if not np.isfinite(max_abs) or max_abs <= 0:
-        max_abs = 100.0
+    max_abs = _robust_abs_max(monthly.to_numpy(dtype=float))
 
     fig = px.imshow(
-        filtered,
+        monthly,
         color_continuous_scale=diverging_scale,
         color_continuous_midpoint=0,
         zmin=-max_abs,
         zmax=max_abs,
         origin="upper",
         aspect="auto",
-        text_auto=".2f",  # type: ignore
+        text_auto=".2f" if show_text else False,  # type: ignore
         labels=dict(month="Month", year="Year", color="Return (%)"),
     )
     fig.update_xaxes(title="")
-    fig.update_yaxes(title="Year")
+    fig.update_yaxes(title="Year", type="category")
     fig.update_layout(
         title=f"Sector Average Monthly Returns - {sector}",
         coloraxis_colorbar_ticksuffix="%",
@@ -137,26 +126,20 @@ def generate_sector_heatmap(
     return fig
 
 
+@st.cache_data(ttl=60 * 60, show_spinner=False)
 def generate_sector_monthly_avg_barchart(
     sector: str,
     *,
     min_year: int = 1900,
     max_year: int = 2100,
     use_cache: bool = True,
-    force_refresh: bool = False,
+    monthly: pd.DataFrame | None = None,
 ):
-    sector_df = get_sector_monthly_analysis(
-        sector, use_cache=use_cache, force_refresh=force_refresh
-    )
-
-    sector_df = sector_df.filter(
-        items=[str(y) for y in range(min_year, max_year + 1)], axis="index"
-    )
-    sector_df = add_avg_monthly_return(sector_df)
-    if "monthly_avg" not in sector_df.index:
-        raise ValueError("Failed to compute monthly average for sector chart")
+    if monthly is None:
+        sector_df = get_sector_monthly_analysis(sector, use_cache=use_cache)
+        monthly = get_monthly_percentages(sector_df, min_year, max_year)
 
-    monthly_avg = sector_df.loc[["monthly_avg"], MONTHS].iloc[0].mul(100).round(2)
+    monthly_avg = get_avg_monthly_returns(monthly).round(2)
     fig = px.bar(
         x=monthly_avg.index,
         y=monthly_avg.values,